@@ -0,0 +1,122 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+import mcp.types
+from fastmcp import Client
+from fastmcp.client.transports import PythonStdioTransport
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+server_script = os.path.join(base_dir, '..', '..', 'sample_server_tool.py')
+sys.path.insert(0, os.path.join(base_dir, '..', '..'))
+
+from sample_server_tool import MAX_BATCH_CALLS, mcp as sample_server  # noqa: E402
+
+# [Batch / Pipelined Calls]
+# call_toolを1件ずつawaitすると、毎回レスポンスを待ってから次のリクエストを送ることになる
+# ClientSessionはリクエストIDでレスポンスを対応付けているので、1つのセッション上で複数のリクエストを同時に送ってもよい
+# サーバー側もリクエストごとにタスクを起動して処理するため、レスポンスを待たずに次々と送ることが出来る（パイプライン化）
+
+async def pipeline_call_tool(
+    client: Client,
+    calls: list[tuple[str, dict]],
+    max_in_flight: int | None = None,
+) -> list[mcp.types.CallToolResult]:
+    """Send many tools/call requests over one session without waiting for each response.
+
+    Results are returned in the same order as calls. A failing call (e.g. divide by zero)
+    does not abort the others; check CallToolResult.isError for each item.
+    """
+    # 同時に送るリクエスト数に上限を付けたい場合はmax_in_flightを指定する
+    semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+
+    async def call(name: str, arguments: dict) -> mcp.types.CallToolResult:
+        if semaphore is None:
+            return await client.call_tool_mcp(name, arguments)
+        async with semaphore:
+            return await client.call_tool_mcp(name, arguments)
+
+    return await asyncio.gather(*(call(name, arguments) for name, arguments in calls))
+
+
+async def batch_call_tool(
+    client: Client, calls: list[tuple[str, dict]], batch_size: int = MAX_BATCH_CALLS
+) -> list[dict]:
+    """Run many tool calls via the server-side batch_call tool, batch_size calls per request."""
+    results = []
+    # batch_callは1リクエストにMAX_BATCH_CALLS件までしか受け付けないので分割して送る
+    for start in range(0, len(calls), batch_size):
+        result = await client.call_tool(
+            "batch_call",
+            {"calls": [{"tool": name, "arguments": arguments} for name, arguments in calls[start:start + batch_size]]},
+        )
+        # batch_callはlist[dict]を返すので、デフォルトのシリアライザーでJSON文字列になっている
+        # 各要素のresultはサーバー側でデコード済みなので、ここで1回デコードすれば値として扱える
+        results += json.loads(result[0].text)
+    return results
+
+
+#----------------Benchmark----------------
+
+def make_calls(n: int) -> list[tuple[str, dict]]:
+    """Mix of cheap arithmetic tools, including a divide by zero every 10th call."""
+    calls = []
+    for i in range(n):
+        if i % 3 == 0:
+            calls.append(("multiply", {"a": i, "b": 2}))
+        elif i % 3 == 1:
+            calls.append(("calculate_sum", {"a": i, "b": 1}))
+        else:
+            calls.append(("divide", {"a": i, "b": 0 if i % 10 == 2 else 3}))
+    return calls
+
+
+async def sequential_call_tool(client: Client, calls: list[tuple[str, dict]]) -> list[mcp.types.CallToolResult]:
+    return [await client.call_tool_mcp(name, arguments) for name, arguments in calls]
+
+
+async def benchmark(label: str, client: Client, n: int) -> None:
+    calls = make_calls(n)
+    async with client:
+        # 初回呼び出しのコストを除外するためのウォームアップ
+        await client.call_tool_mcp("multiply", {"a": 1, "b": 1})
+
+        timings = {}
+        for mode, runner in (
+            ("sequential", sequential_call_tool),
+            ("pipelined", pipeline_call_tool),
+            ("batch_call", batch_call_tool),
+        ):
+            start = time.perf_counter()
+            results = await runner(client, calls)
+            timings[mode] = time.perf_counter() - start
+            assert len(results) == n
+
+    baseline = timings["sequential"]
+    print(f"[{label}] {n} calls")
+    for mode, elapsed in timings.items():
+        per_call_us = elapsed / n * 1_000_000
+        print(f"  {mode:<10} {per_call_us:9.1f} us/call  x{baseline / elapsed:5.1f}")
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    # divideのToolErrorはサーバー側でトレースバック付きでログ出力されるので、計測の邪魔にならないように抑制する
+    logging.getLogger("FastMCP").setLevel(logging.CRITICAL)
+    stdio_transport = PythonStdioTransport(script_path=server_script, env={"FASTMCP_LOG_LEVEL": "CRITICAL"})
+
+    # 結果の順番と要素ごとのエラーを確認
+    async with Client(sample_server) as client:
+        calls = [("multiply", {"a": 3, "b": 4}), ("divide", {"a": 1, "b": 0}), ("calculate_sum", {"a": 1, "b": 2})]
+        print([(r.isError, r.content[0].text) for r in await pipeline_call_tool(client, calls)])
+        print(await batch_call_tool(client, calls))
+
+    await benchmark("in-memory", Client(sample_server), n)
+    await benchmark("stdio", Client(stdio_transport), n)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
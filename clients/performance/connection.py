@@ -0,0 +1,23 @@
+from collections.abc import Callable
+from contextlib import AsyncExitStack
+
+from fastmcp import Client
+
+# [Connection]
+# fastmcp 2.5のClientはinitializeを1秒でタイムアウトさせるが、stdioのサーバーはimportだけで1秒前後かかる
+# 同時に起動すると確実に間に合わず、1つずつでも稀に失敗するので、接続は1つずつ行い失敗したら作り直す
+
+DEFAULT_CONNECT_ATTEMPTS = 3
+
+
+async def connect_client(
+    stack: AsyncExitStack, client_factory: Callable[[], Client], attempts: int = DEFAULT_CONNECT_ATTEMPTS
+) -> Client:
+    """Enter a client from client_factory on stack, retrying when initialize times out."""
+    for attempt in range(attempts):
+        try:
+            return await stack.enter_async_context(client_factory())
+        except RuntimeError:
+            # "Failed to initialize server session"。2回目以降はimportがキャッシュに乗って速くなる
+            if attempt == attempts - 1:
+                raise
@@ -0,0 +1,25 @@
+import math
+
+# [Latency Stats]
+# traffic_replay.pyとload_test.pyで共通に使う、レイテンシ分布の集計（単位は秒）
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(1, rank)) - 1]
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "p999": percentile(values, 99.9),
+        "max": values[-1] if values else 0.0,
+    }
@@ -0,0 +1,297 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from fastmcp import Client
+from fastmcp.client.transports import PythonStdioTransport, StreamableHttpTransport
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(base_dir, '..', '..')
+server_script = os.path.join(root_dir, 'my_server.py')
+sys.path.insert(0, root_dir)
+
+from clients.performance.connection import connect_client  # noqa: E402
+from clients.performance.latency_stats import latency_summary  # noqa: E402
+
+# [Load Test]
+# my_server.pyに対してN個のクライアントを同時に接続し、同時接続数を増やしながら負荷をかけて
+# レイテンシ(p50/p99/p999)・スループット・サーバーのCPU/RSSを計測し、飽和曲線のレポートを出す
+# ・closed loop: 各クライアントが応答を受け取ってから次のリクエストを送る（think timeあり）
+# ・open loop: 応答を待たずに、全体でrate件/秒のポアソン到着でリクエストを送る。同時接続数ごとにrateも段階的に上げる
+# トランスポートごとの違い
+# ・in-memory: サーバーは同じプロセス内。CPU/RSSはクライアント込みの値になる
+# ・stdio: クライアント1つにつきサーバープロセスが1つ起動する（1対1）。CPU/RSSは全サーバープロセスの合計
+# ・streamable-http: 1つのサーバープロセスを全クライアントで共有する
+
+TRANSPORTS = ["in-memory", "stdio", "streamable-http"]
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def parse_mix(spec: str) -> list[tuple[str, float]]:
+    """"divide=9,greet=1" -> [("divide", 9.0), ("greet", 1.0)]"""
+    mix = []
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        mix.append((name.strip(), float(weight or 1)))
+    return mix
+
+
+def make_arguments(name: str, greet_seconds: float) -> dict:
+    if name == "divide":
+        return {"a": random.randint(1, 1000), "b": random.randint(1, 100)}
+    if name == "greet":
+        # greetは同期関数のtime.sleepなので、実行中はサーバーのイベントループを止める
+        return {"name": "load-test", "duration_time_second": greet_seconds}
+    return {}
+
+
+#----------------Server resource usage----------------
+
+def child_pids(pid: int) -> list[int]:
+    pids = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                pids += [int(child) for child in f.read().split()]
+    except OSError:
+        pass
+    return pids
+
+
+def process_usage(pids: list[int]) -> tuple[float, int] | None:
+    """(CPU seconds, RSS bytes) summed over pids, read from /proc. None where /proc is unavailable."""
+    cpu, rss = 0.0, 0
+    try:
+        for pid in pids:
+            with open(f"/proc/{pid}/stat") as f:
+                # commに空白が含まれる場合に備えて、最後の")"以降をフィールドとして扱う
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+            with open(f"/proc/{pid}/status") as f:
+                rss += next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+    except (OSError, StopIteration):
+        return None
+    return cpu, rss
+
+
+#----------------Transports----------------
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def http_server():
+    """Run my_server.py with the streamable-http transport in a subprocess."""
+    port = free_port()
+    code = (
+        "import my_server; "
+        f"my_server.mcp.run(transport='streamable-http', host='127.0.0.1', port={port}, log_level='warning')"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-c", code],
+        cwd=root_dir,
+        env=os.environ | {"FASTMCP_LOG_LEVEL": "WARNING"},
+    )
+    try:
+        # ポートが開くまで待つ
+        for _ in range(200):
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                    break
+            except OSError:
+                await asyncio.sleep(0.05)
+        else:
+            raise RuntimeError("streamable-http server did not start")
+        yield f"http://127.0.0.1:{port}/mcp", process.pid
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def client_factory(transport: str, url: str | None):
+    if transport == "in-memory":
+        from my_server import mcp as server
+        return lambda: Client(server)
+    if transport == "stdio":
+        return lambda: Client(PythonStdioTransport(script_path=server_script, env={"FASTMCP_LOG_LEVEL": "WARNING"}))
+    return lambda: Client(StreamableHttpTransport(url=url))
+
+
+def server_pids(transport: str, http_pid: int | None) -> list[int]:
+    if transport == "in-memory":
+        return [os.getpid()]
+    if transport == "stdio":
+        return child_pids(os.getpid())
+    return [http_pid]
+
+
+#----------------Load generation----------------
+
+async def call(client: Client, mix: list[tuple[str, float]], greet_seconds: float, samples: list) -> None:
+    names, weights = zip(*mix)
+    name = random.choices(names, weights)[0]
+    start = time.perf_counter()
+    try:
+        is_error = (await client.call_tool_mcp(name, make_arguments(name, greet_seconds))).isError
+    except Exception:
+        # 過負荷時のタイムアウトや接続断、stdioの子プロセスの終了なども1件のエラーとして数えて計測を続ける
+        is_error = True
+    samples.append((time.perf_counter() - start, is_error))
+
+
+async def closed_loop(clients: list[Client], duration: float, think_time: float, **kwargs) -> list:
+    samples: list = []
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: Client) -> None:
+        while time.perf_counter() < deadline:
+            await call(client, samples=samples, **kwargs)
+            if think_time:
+                await asyncio.sleep(random.expovariate(1 / think_time))
+
+    await asyncio.gather(*(worker(client) for client in clients))
+    return samples
+
+
+async def open_loop(clients: list[Client], duration: float, rate: float, **kwargs) -> list:
+    samples: list = []
+    tasks = []
+    deadline = time.perf_counter() + duration
+    next_arrival = time.perf_counter()
+    i = 0
+    while next_arrival < deadline:
+        await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+        # 到着したリクエストはクライアントにラウンドロビンで割り振る（応答は待たない）
+        tasks.append(asyncio.create_task(call(clients[i % len(clients)], samples=samples, **kwargs)))
+        i += 1
+        next_arrival += random.expovariate(rate)
+    await asyncio.gather(*tasks)
+    return samples
+
+
+async def run_level(
+    args, transport: str, concurrency: int, rate: float | None, url: str | None, http_pid: int | None
+) -> dict:
+    factory = client_factory(transport, url)
+    async with AsyncExitStack() as stack:
+        # stdioはサーバーの起動に時間がかかるため、クライアントは1つずつ接続してから計測を始める
+        clients = [await connect_client(stack, factory) for _ in range(concurrency)]
+
+        pids = server_pids(transport, http_pid)
+        before = process_usage(pids)
+        start = time.perf_counter()
+        kwargs = {"mix": args.mix, "greet_seconds": args.greet_seconds}
+        if args.mode == "closed":
+            samples = await closed_loop(clients, args.duration, args.think_time, **kwargs)
+        else:
+            samples = await open_loop(clients, args.duration, rate, **kwargs)
+        elapsed = time.perf_counter() - start
+        after = process_usage(pids)
+
+    latencies = [latency for latency, _ in samples]
+    row = {
+        "transport": transport,
+        "concurrency": concurrency,
+        "offered_rate": rate,
+        "requests": len(samples),
+        "errors": sum(is_error for _, is_error in samples),
+        "throughput": len(samples) / elapsed,
+        **{key: value for key, value in latency_summary(latencies).items() if key != "count"},
+    }
+    if rate is not None:
+        # ポアソン到着なので実際に送った件数は指定レートからぶれる。飽和の判定は実際の到着レートと比べる
+        row["arrival_rate"] = len(samples) / args.duration
+    if before and after:
+        row["server_cpu_percent"] = (after[0] - before[0]) / elapsed * 100
+        row["server_rss_mb"] = after[1] / 1024 ** 2
+    return row
+
+
+def saturation_point(rows: list[dict]) -> str | None:
+    """Where the server stops keeping up, or None if it kept up for the whole sweep.
+
+    closed loop: the concurrency after which adding clients gains <10% throughput while p99 keeps growing.
+    open loop: per concurrency, the first offered rate whose throughput falls below 95% of the requests
+    actually sent per second, i.e. a backlog was still draining after the arrivals stopped.
+    """
+    if rows[0]["offered_rate"] is None:
+        for previous, current in zip(rows, rows[1:]):
+            if current["throughput"] < previous["throughput"] * 1.1 and current["p99"] > previous["p99"]:
+                return f"~{previous['concurrency']} concurrent clients"
+        return None
+    knees = {}
+    for row in rows:
+        if row["concurrency"] not in knees and row["throughput"] < row["arrival_rate"] * 0.95:
+            knees[row["concurrency"]] = row["offered_rate"]
+    if not knees:
+        return None
+    return ", ".join(f"~{rate:g} req/s offered with {concurrency} clients" for concurrency, rate in knees.items())
+
+
+def print_report(transport: str, rows: list[dict]) -> None:
+    peak = max(row["throughput"] for row in rows) or 1
+    print(f"[{transport}]")
+    print(
+        f"  {'conc':>5} {'offered':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'p999 ms':>8} {'err':>5}"
+        f" {'cpu%':>6} {'rss MB':>7}  throughput"
+    )
+    for row in rows:
+        bar = "#" * int(row["throughput"] / peak * 30)
+        offered = f"{row['offered_rate']:8g}" if row["offered_rate"] else f"{'-':>8}"
+        print(
+            f"  {row['concurrency']:>5} {offered} {row['throughput']:9.1f} {row['p50'] * 1000:8.2f}"
+            f" {row['p99'] * 1000:8.2f} {row['p999'] * 1000:8.2f} {row['errors']:>5}"
+            f" {row.get('server_cpu_percent', 0):6.1f} {row.get('server_rss_mb', 0):7.1f}  {bar}"
+        )
+    knee = saturation_point(rows)
+    print(f"  saturation: {knee or 'not reached in this sweep'}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for my_server.py across transports.")
+    parser.add_argument("--transport", choices=TRANSPORTS, action="append", help="repeatable, default all")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="comma separated sweep")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per level")
+    parser.add_argument("--think-time", type=float, default=0.0, help="closed loop: mean seconds between requests")
+    parser.add_argument(
+        "--rate", default="50,100,200,400,800",
+        help="open loop: comma separated sweep of total requests per second, run at every concurrency level",
+    )
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("divide=9,greet=1"))
+    parser.add_argument("--greet-seconds", type=float, default=0.001)
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+    # closed loopでは同時接続数だけ、open loopでは同時接続数ごとに到着レートも変えて負荷を上げる
+    rates = list(map(float, args.rate.split(","))) if args.mode == "open" else [None]
+
+    report = {}
+    for transport in args.transport or TRANSPORTS:
+        rows = []
+        async with AsyncExitStack() as stack:
+            url = http_pid = None
+            if transport == "streamable-http":
+                url, http_pid = await stack.enter_async_context(http_server())
+            for concurrency in map(int, args.concurrency.split(",")):
+                for rate in rates:
+                    rows.append(await run_level(args, transport, concurrency, rate, url, http_pid))
+        print_report(transport, rows)
+        report[transport] = rows
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import sys
+import time
+
+import mcp.types
+from fastmcp import Client, FastMCP
+from fastmcp.tools import Tool
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(base_dir, '..', '..'))
+
+from indexed_registry import IndexedFastMCP  # noqa: E402
+
+# [Paginated Listing]
+# IndexedFastMCPのlist_toolsはpage_size件ずつしか返さないので、nextCursorを辿って全件を取得する
+# fastmcpのClient.list_tools()はカーソルを扱わないため、session.list_tools(cursor=...)を直接呼び出す
+
+async def iter_tool_pages(client: Client):
+    """Yield each page of tools until the server stops returning nextCursor."""
+    cursor = None
+    while True:
+        result = await client.session.list_tools(cursor=cursor)
+        yield result.tools
+        if not result.nextCursor:
+            return
+        cursor = result.nextCursor
+
+
+async def list_all_tools(client: Client) -> list[mcp.types.Tool]:
+    return [tool async for page in iter_tool_pages(client) for tool in page]
+
+
+#----------------Benchmark----------------
+
+def generated_tool(i: int) -> Tool:
+    def fn(a: float, b: float) -> float:
+        return a * b
+
+    # 数千件のツールを生成するケースを想定。tagはカテゴリー10種類＋共通のcatalog
+    return Tool.from_function(
+        fn,
+        name=f"group{i % 50:02d}_tool{i:05d}",
+        description=f"Generated tool number {i}",
+        tags={"catalog", f"category{i % 10}"},
+    )
+
+
+def build_server(server_cls: type[FastMCP], n: int) -> FastMCP:
+    server = server_cls(name=f"{server_cls.__name__}-{n}")
+    for i in range(n):
+        server._tool_manager.add_tool(generated_tool(i))
+    return server
+
+
+def build_mounted_server(server_cls: type[FastMCP], n: int) -> FastMCP:
+    # 子サーバーをmountした場合は、親のインデックスはマージ済みの一覧から作られる
+    parent = server_cls(name=f"{server_cls.__name__}-parent")
+    parent.mount("child", build_server(FastMCP, n))
+    return parent
+
+
+def linear_find(server: FastMCP, tags: set[str], prefix: str) -> list[str]:
+    # 素のFastMCPで同じ検索をする場合は全件走査になる
+    return sorted(
+        key for key, tool in server._tool_manager.get_tools().items()
+        if key.startswith(prefix) and tags <= tool.tags
+    )
+
+
+async def timed(coro_fn, repeat: int = 20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        value = await coro_fn()
+    return value, (time.perf_counter() - start) / repeat * 1000
+
+
+async def benchmark(n: int) -> None:
+    plain = build_server(FastMCP, n)
+    indexed = build_server(IndexedFastMCP, n)
+    tags, prefix = {"category3"}, "group13_"
+
+    async with Client(plain) as plain_client, Client(indexed) as indexed_client:
+        full, full_ms = await timed(plain_client.list_tools)
+        first_page, page_ms = await timed(indexed_client.list_tools)
+        paged, paged_ms = await timed(lambda: list_all_tools(indexed_client))
+        assert [tool.name for tool in paged] == sorted(tool.name for tool in full)
+
+    async def plain_find():
+        return linear_find(plain, tags, prefix)
+
+    expected, linear_ms = await timed(plain_find, repeat=200)
+    found, indexed_ms = await timed(lambda: indexed.find_tools(tags, prefix), repeat=200)
+    assert found == expected
+
+    print(f"[{n} tools]")
+    print(f"  list_tools (FastMCP, all at once)   {full_ms:8.2f} ms")
+    print(f"  list_tools (Indexed, first page)    {page_ms:8.2f} ms  ({len(first_page)} tools)")
+    print(f"  list_tools (Indexed, all pages)     {paged_ms:8.2f} ms")
+    print(f"  find tag+prefix (linear scan)       {linear_ms:8.3f} ms  ({len(expected)} matches)")
+    print(f"  find tag+prefix (index)             {indexed_ms:8.3f} ms")
+
+    plain_parent = build_mounted_server(FastMCP, n)
+    indexed_parent = build_mounted_server(IndexedFastMCP, n)
+    async with Client(plain_parent) as plain_client, Client(indexed_parent) as indexed_client:
+        _, mounted_full_ms = await timed(plain_client.list_tools)
+        _, mounted_page_ms = await timed(indexed_client.list_tools)
+        _, mounted_paged_ms = await timed(lambda: list_all_tools(indexed_client))
+    _, mounted_find_ms = await timed(lambda: indexed_parent.find_tools(tags, "child_" + prefix), repeat=200)
+    print(f"  mounted: list_tools (FastMCP)       {mounted_full_ms:8.2f} ms")
+    print(f"  mounted: list_tools (first page)    {mounted_page_ms:8.2f} ms")
+    print(f"  mounted: list_tools (all pages)     {mounted_paged_ms:8.2f} ms")
+    print(f"  mounted: find tag+prefix (index)    {mounted_find_ms:8.3f} ms")
+
+
+async def main():
+    for n in map(int, sys.argv[1:] or ["100", "1000", "5000"]):
+        await benchmark(n)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
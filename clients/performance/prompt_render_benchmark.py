@@ -0,0 +1,81 @@
+import asyncio
+import os
+import random
+import sys
+import time
+
+from fastmcp import Client
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(base_dir, '..', '..'))
+
+from my_server import mcp as my_server  # noqa: E402
+from server_promts import mcp as prompt_server  # noqa: E402
+
+# [Prompt Render Benchmark]
+# enable_prompt_cacheを有効にしたサーバーで、キャッシュあり/なしのget_promptのスループットを比較する
+# get_promptの引数はプロトコル上dict[str, str]なので、list[float]を取るanalyze_dataはサーバーのAPIを直接呼び出す
+
+REQUESTS = [
+    ("ask_about_topic", {"topic": "recursion"}),
+    ("generate_code_request", {"language": "Python", "task_description": "reverse a list"}),
+    ("roleplay_scenario", {"character": "a detective", "situation": "a missing cat"}),
+    ("generate_content_request", {"topic": "MCP", "format": "email", "tone": "casual"}),
+]
+
+
+async def render_throughput(client: Client, n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        name, arguments = REQUESTS[i % len(REQUESTS)]
+        await client.get_prompt(name, arguments)
+    return n / (time.perf_counter() - start)
+
+
+async def direct_throughput(manager, name: str, arguments: dict, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        await manager.render_prompt(name, arguments)
+    return n / (time.perf_counter() - start)
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    manager = prompt_server._prompt_manager
+
+    async with Client(prompt_server) as client:
+        # maxsize=0でキャッシュを無効にした場合と比較する
+        manager.maxsize = 0
+        uncached = await render_throughput(client, n)
+        manager.maxsize = 1024
+        manager.clear_cache()
+        cached = await render_throughput(client, n)
+    print(f"[server_promts via in-memory client] {n} get_prompt")
+    print(f"  uncached {uncached:10.0f} renders/s")
+    print(f"  cached   {cached:10.0f} renders/s  (hits={manager.hits}, misses={manager.misses})")
+
+    # トランスポートを挟まずにレンダリング部分だけを比較する
+    print(f"[server_promts render_prompt direct] {n} renders each")
+    for name, arguments in REQUESTS:
+        manager.maxsize = 0
+        uncached = await direct_throughput(manager, name, arguments, n)
+        manager.maxsize = 1024
+        cached = await direct_throughput(manager, name, arguments, n)
+        print(f"  {name:<26} uncached {uncached:10.0f} renders/s  cached {cached:10.0f} renders/s")
+
+    # 巨大な数値リストのanalyze_data。以前は全要素をそのまま文字列化していた
+    analyze_manager = my_server._prompt_manager
+    for size in (1_000, 100_000, 1_000_000):
+        data_points = [random.random() for _ in range(size)]
+        arguments = {"data_points": data_points}
+        start = time.perf_counter()
+        result = await analyze_manager.render_prompt("analyze_data", arguments)
+        first_ms = (time.perf_counter() - start) * 1000
+        naive = len(", ".join(str(point) for point in data_points))
+        cached = await direct_throughput(analyze_manager, "analyze_data", arguments, 5)
+        print(f"[analyze_data {size:>9,} points] prompt {len(result.messages[0].content.text):>6,} chars"
+              f" (untruncated {naive:>11,})  first render {first_ms:8.1f} ms  cached {cached:8.1f} renders/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import random
+import string
+import sys
+import time
+import zlib
+
+from fastmcp import Client
+from fastmcp.tools.tool import default_serializer
+from mcp.types import TextContent
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(base_dir, '..', '..'))
+
+import result_encoding  # noqa: E402
+from my_server import yaml_serializer  # noqa: E402
+from sample_server_tool import mcp as sample_server  # noqa: E402
+
+# [Result Encoding Benchmark]
+# 同じ結果をデフォルトのJSONテキストで返した場合と、取り決めたエンコーディングのblobで返した場合を比較する
+# bytes on the wireはJSON-RPCメッセージ上のcontent部分（base64やエスケープ込み）のサイズ
+
+SIZES = {"1KB": 1024, "1MB": 1024 ** 2, "100MB": 100 * 1024 ** 2}
+
+
+CATEGORIES = ["books", "electronics", "garden", "kitchen", "sports", "toys", "clothing", "music"]
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))).capitalize()
+
+
+def make_products(size: int, seed: int = 0) -> list[dict]:
+    """Roughly size bytes of find_products-like rows once serialized as JSON.
+
+    Names, prices, categories and stock flags vary per row so compression ratios are realistic.
+    """
+    rng = random.Random(seed)
+    rows = []
+    total = 0
+    while total < size or not rows:
+        row = {
+            "id": len(rows),
+            "name": " ".join(random_word(rng) for _ in range(rng.randint(1, 4))),
+            "category": rng.choice(CATEGORIES),
+            "price": round(rng.uniform(0.5, 2000), 2),
+            "in_stock": rng.random() < 0.7,
+        }
+        total += len(json.dumps(row)) + 2
+        rows.append(row)
+    return rows
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    value = fn(*args)
+    return value, time.perf_counter() - start
+
+
+def bench_text(data, serializer) -> tuple[int, float, float]:
+    # サーバーと同じシリアライザーでテキスト化する（FastMCPのデフォルトはpydantic_core.to_json、my_serverはYAML）
+    text, encode_time = timed(serializer, data)
+    wire, _ = timed(lambda: TextContent(type="text", text=text).model_dump_json())
+    if serializer is yaml_serializer:
+        # YAMLを読み戻すのは非常に遅いので、クライアント側の処理時間としては計測しない
+        decode_time = float("nan")
+    else:
+        _, decode_time = timed(json.loads, text)
+    return len(wire), encode_time, decode_time
+
+
+def bench_blob(data, encoding: str) -> tuple[int, float, float]:
+    def encode():
+        return result_encoding.to_blob_content(result_encoding.encode(data, encoding), result_encoding.MIME_TYPES[encoding])
+
+    content, encode_time = timed(encode)
+    wire = content.model_dump_json()
+    _, decode_time = timed(result_encoding.decode_result, [content])
+    return len(wire), encode_time, decode_time
+
+
+def bench_raw(payload: memoryview, mime_type: str) -> tuple[int, float, float]:
+    def encode():
+        if mime_type.endswith("+zlib"):
+            return result_encoding.to_blob_content(zlib.compress(payload, 1), mime_type)
+        return result_encoding.to_blob_content(payload, mime_type)
+
+    content, encode_time = timed(encode)
+    wire = content.model_dump_json()
+    _, decode_time = timed(result_encoding.decode_result, [content])
+    return len(wire), encode_time, decode_time
+
+
+def report(label: str, wire: int, encode_time: float, decode_time: float) -> None:
+    print(f"  {label:<28} {wire:>13,} B  encode {encode_time * 1000:9.2f} ms  decode {decode_time * 1000:9.2f} ms")
+
+
+async def negotiated_round_trip() -> None:
+    # 閾値0にして、小さなfind_productsの結果でもblobで返却されることを確認する
+    async with Client(sample_server) as client:
+        accept = ["msgpack+zlib", "json+zlib"]
+        encoding = await client.call_tool("negotiate_result_encoding", {"accept": accept, "threshold": 0})
+        print(f"negotiated: {encoding[0].text}")
+        contents = await client.call_tool("find_products", {"query": "product"})
+        print(f"find_products: {type(contents[0]).__name__} -> {result_encoding.decode_result(contents)}")
+
+
+def main():
+    selected = sys.argv[1:] or list(SIZES)
+    asyncio.run(negotiated_round_trip())
+
+    for name in selected:
+        size = SIZES[name]
+        data = make_products(size)
+        print(f"[{name}] {len(data)} rows")
+        report("json text (FastMCP default)", *bench_text(data, default_serializer))
+        if size <= SIZES["1MB"]:
+            # 100MBのYAML化は数分かかるので省略する
+            report("yaml text (my_server)", *bench_text(data, yaml_serializer))
+        for encoding in result_encoding.available_encodings():
+            report(encoding, *bench_blob(data, encoding))
+
+        payload = memoryview(os.urandom(size))
+        for mime_type in result_encoding.RAW_MIME_TYPES:
+            report(f"raw bytes {mime_type.split('/')[1]}", *bench_raw(payload, mime_type))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from typing import Any, Callable
+
+import mcp.types
+from fastmcp import Client
+from fastmcp.client.transports import PythonStdioTransport
+from mcp.shared.exceptions import McpError
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+server_script = os.path.join(base_dir, '..', '..', 'sample_server_tool.py')
+sys.path.insert(0, os.path.join(base_dir, '..', '..'))
+
+from clients.performance.connection import connect_client  # noqa: E402
+from clients.performance.latency_stats import latency_summary  # noqa: E402
+from sample_server_tool import mcp as sample_server  # noqa: E402
+
+# [Traffic Recorder / Replay]
+# 実際のMCPセッションのリクエスト・タイミング・同時実行数を記録して、後から同じパターンで再生する
+# ・RecordingClient: Clientのサブクラス。*_mcpメソッドを通るリクエストを全てTrafficRecorderに記録する
+# ・replay: 記録をセッションごとに元の時刻（speed倍速）で送り直し、レイテンシの分布を集計する
+# ・compare: 2回分の集計結果の差分を表示する
+# 記録ファイルはgzip圧縮したJSON Lines（1行目がヘッダー、以降が1リクエスト1行）
+
+RECORDING_VERSION = 1
+# 外部APIを呼ぶため、再生時には記録した応答で代用するツール
+DEFAULT_STUB_TOOLS = {"fetch_weather"}
+
+
+class TrafficRecorder:
+    """Collects request events from one or more RecordingClients sharing a clock.
+
+    Responses are stored only for calls to keep_responses, the tools that replay will stub.
+    """
+
+    def __init__(self, keep_responses: set[str] | None = None):
+        self.keep_responses = DEFAULT_STUB_TOOLS if keep_responses is None else keep_responses
+        self.started = time.time()
+        self._origin = time.perf_counter()
+        self._sessions = 0
+        self._in_flight = 0
+        self.events: list[dict] = []
+
+    def new_session(self) -> int:
+        self._sessions += 1
+        return self._sessions - 1
+
+    def now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    async def record(self, session: int, method: str, params: dict, send: Callable) -> Any:
+        start = self.now()
+        self._in_flight += 1
+        # 同時実行数はこのリクエストを送った時点で応答待ちになっている数（自分を含む）
+        event = {"s": session, "t": round(start, 6), "m": method, "p": params, "c": self._in_flight}
+        # 記録を小さく保つため、レスポンスは再生時にスタブにするツールの分だけ残す
+        keep_response = method == "tools/call" and params["name"] in self.keep_responses
+        try:
+            result = await send()
+        except McpError as e:
+            event["e"] = True
+            if keep_response:
+                event["r"] = {"error": e.error.message}
+            raise
+        except BaseException:
+            # キャンセルやストリームの切断など、McpError以外で失敗した場合もエラーとして記録する
+            event["e"] = True
+            raise
+        else:
+            event["e"] = bool(getattr(result, "isError", False))
+            if keep_response:
+                event["r"] = result.model_dump(mode="json", exclude_none=True)
+            return result
+        finally:
+            self._in_flight -= 1
+            event["d"] = round(self.now() - start, 6)
+            self.events.append(event)
+
+    def save(self, path: str) -> None:
+        header = {"version": RECORDING_VERSION, "started": self.started, "sessions": self._sessions}
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            for event in sorted(self.events, key=lambda event: event["t"]):
+                f.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+
+def load_recording(path: str) -> tuple[dict, list[dict]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"Unsupported recording version: {header.get('version')}")
+        return header, [json.loads(line) for line in f]
+
+
+class RecordingClient(Client):
+    """Client that records every request it sends to a TrafficRecorder."""
+
+    def __init__(self, *args, recorder: TrafficRecorder, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recorder = recorder
+        self.recording_session = recorder.new_session()
+
+    def _record(self, method: str, params: dict, send: Callable):
+        return self.recorder.record(self.recording_session, method, params, send)
+
+    async def ping(self) -> bool:
+        return await self._record("ping", {}, super().ping)
+
+    async def list_tools_mcp(self) -> mcp.types.ListToolsResult:
+        return await self._record("tools/list", {}, super().list_tools_mcp)
+
+    async def list_prompts_mcp(self) -> mcp.types.ListPromptsResult:
+        return await self._record("prompts/list", {}, super().list_prompts_mcp)
+
+    async def list_resources_mcp(self) -> mcp.types.ListResourcesResult:
+        return await self._record("resources/list", {}, super().list_resources_mcp)
+
+    async def read_resource_mcp(self, uri) -> mcp.types.ReadResourceResult:
+        return await self._record(
+            "resources/read", {"uri": str(uri)}, lambda: super(RecordingClient, self).read_resource_mcp(uri)
+        )
+
+    async def get_prompt_mcp(self, name: str, arguments: dict | None = None) -> mcp.types.GetPromptResult:
+        return await self._record(
+            "prompts/get",
+            {"name": name, "arguments": arguments},
+            lambda: super(RecordingClient, self).get_prompt_mcp(name, arguments),
+        )
+
+    async def call_tool_mcp(self, name: str, arguments: dict, *args, **kwargs) -> mcp.types.CallToolResult:
+        return await self._record(
+            "tools/call",
+            {"name": name, "arguments": arguments},
+            lambda: super(RecordingClient, self).call_tool_mcp(name, arguments, *args, **kwargs),
+        )
+
+
+#----------------Replay----------------
+
+def event_label(event: dict) -> str:
+    name = event["p"].get("name")
+    return f"{event['m']} {name}" if name else event["m"]
+
+
+async def send_event(client: Client, event: dict) -> bool:
+    """Send one recorded request. Returns True if the server reported an error."""
+    method, params = event["m"], event["p"]
+    if method == "tools/call":
+        return (await client.call_tool_mcp(params["name"], params["arguments"])).isError
+    if method == "prompts/get":
+        await client.get_prompt_mcp(params["name"], params["arguments"])
+    elif method == "resources/read":
+        await client.read_resource_mcp(params["uri"])
+    elif method == "tools/list":
+        await client.list_tools_mcp()
+    elif method == "prompts/list":
+        await client.list_prompts_mcp()
+    elif method == "resources/list":
+        await client.list_resources_mcp()
+    elif method == "ping":
+        await client.ping()
+    else:
+        raise ValueError(f"Unsupported method in recording: {method}")
+    return False
+
+
+def stub_response(event: dict) -> mcp.types.CallToolResult:
+    """The recorded response of a stubbed tools/call event."""
+    recorded = event.get("r")
+    if recorded is None:
+        # keep_responsesの対象外で応答が記録されていない場合は、記録時の成否だけを再現する
+        return mcp.types.CallToolResult(content=[], isError=event["e"])
+    if "error" in recorded:
+        content = [mcp.types.TextContent(type="text", text=recorded["error"])]
+        return mcp.types.CallToolResult(content=content, isError=True)
+    return mcp.types.CallToolResult.model_validate(recorded)
+
+
+async def replay(
+    events: list[dict],
+    client_factory: Callable[[], Client],
+    speed: float | None = 1.0,
+    stub_tools: set[str] | None = None,
+) -> list[dict]:
+    """Replay recorded events and return one sample per request.
+
+    Each recorded session gets its own client from client_factory. Requests are sent at
+    their recorded offsets divided by speed (speed=None sends as fast as possible), so the
+    recorded concurrency is reproduced. speed only compresses the gaps between requests.
+    Calls to stub_tools (e.g. fetch_weather, which hits an external API) are not sent; the
+    recorded response is returned after the recorded duration, whatever the speed.
+    """
+    stub_tools = stub_tools or set()
+    sessions: dict[int, list[dict]] = defaultdict(list)
+    for event in events:
+        sessions[event["s"]].append(event)
+
+    samples: list[dict] = []
+    origin = 0.0
+
+    async def run_event(client: Client, event: dict) -> None:
+        if speed:
+            await asyncio.sleep(max(0.0, origin + event["t"] / speed - time.perf_counter()))
+        start = time.perf_counter()
+        if event["m"] == "tools/call" and event["p"]["name"] in stub_tools:
+            # 倍速にするのはリクエストの到着間隔だけ。スタブの処理時間は記録したままにする
+            await asyncio.sleep(event["d"])
+            is_error = stub_response(event).isError
+        else:
+            try:
+                is_error = await send_event(client, event)
+            except Exception:
+                # McpErrorに限らず、トランスポートの切断なども1件のエラーとして数えて再生を続ける
+                is_error = True
+        samples.append({
+            "label": event_label(event),
+            "latency": time.perf_counter() - start,
+            "error": is_error,
+        })
+
+    async def run_session(client: Client, session_events: list[dict]) -> None:
+        # 同じセッション内のリクエストも記録時には並行して送られていた可能性があるので、1件ずつタスクにする
+        await asyncio.gather(*(run_event(client, event) for event in session_events))
+
+    async with AsyncExitStack() as stack:
+        # stdioはサーバーの起動に時間がかかるので、全セッションのクライアントを1つずつ接続してから記録の時刻0を合わせる
+        clients = [await connect_client(stack, client_factory) for _ in sessions]
+        origin = time.perf_counter()
+        await asyncio.gather(*(
+            run_session(client, session_events) for client, session_events in zip(clients, sessions.values())
+        ))
+    return samples
+
+
+def summarize(samples: list[dict]) -> dict[str, dict]:
+    """Latency distribution per request label plus an "all" row, in seconds."""
+    by_label: dict[str, list[dict]] = defaultdict(list)
+    for sample in samples:
+        by_label[sample["label"]].append(sample)
+        by_label["all"].append(sample)
+    return {
+        label: latency_summary([sample["latency"] for sample in group])
+        | {"errors": sum(sample["error"] for sample in group)}
+        for label, group in sorted(by_label.items())
+    }
+
+
+def summarize_recording(events: list[dict]) -> dict[str, dict]:
+    """Same shape as summarize, using the latencies observed while recording."""
+    return summarize([
+        {"label": event_label(event), "latency": event["d"], "error": event["e"]} for event in events
+    ])
+
+
+def print_summary(summary: dict[str, dict]) -> None:
+    print(f"  {'request':<32} {'count':>6} {'err':>4} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for label, row in summary.items():
+        print(
+            f"  {label:<32} {row['count']:>6} {row['errors']:>4} {row['p50'] * 1000:9.3f}"
+            f" {row['p90'] * 1000:9.3f} {row['p99'] * 1000:9.3f} {row['max'] * 1000:9.3f}"
+        )
+
+
+def compare(baseline: dict[str, dict], candidate: dict[str, dict]) -> None:
+    """Print p50/p99 of two summaries side by side with the relative change."""
+    print(f"  {'request':<32} {'p50 base':>9} {'p50 new':>9} {'change':>8} {'p99 base':>9} {'p99 new':>9} {'change':>8}")
+    for label in sorted(set(baseline) | set(candidate)):
+        if label not in baseline or label not in candidate:
+            print(f"  {label:<32} only in {'baseline' if label in baseline else 'candidate'}")
+            continue
+        row = [label]
+        for q in ("p50", "p99"):
+            base, new = baseline[label][q], candidate[label][q]
+            change = (new - base) / base * 100 if base else 0.0
+            row += [f"{base * 1000:9.3f}", f"{new * 1000:9.3f}", f"{change:+7.1f}%"]
+        print(f"  {row[0]:<32} " + " ".join(row[1:]))
+
+
+#----------------Command line----------------
+
+def make_client_factory(transport: str) -> Callable[[], Client]:
+    if transport == "stdio":
+        return lambda: Client(PythonStdioTransport(script_path=server_script, env={"FASTMCP_LOG_LEVEL": "CRITICAL"}))
+    return lambda: Client(sample_server)
+
+
+async def record_sample_traffic(path: str, sessions: int, requests: int, keep_responses: set[str]) -> None:
+    """Record a synthetic but realistic mix against the in-memory sample server."""
+    recorder = TrafficRecorder(keep_responses=keep_responses)
+    mix = [
+        ("multiply", lambda: {"a": random.random(), "b": random.random()}),
+        ("calculate_sum", lambda: {"a": random.random(), "b": random.random()}),
+        ("divide", lambda: {"a": random.random(), "b": random.choice([0, 1, 2])}),
+        ("find_products", lambda: {"query": random.choice(["pen", "book", "lamp"])}),
+        ("fetch_weather", lambda: {"city": random.choice(["Tokyo", "London"])}),
+    ]
+
+    async def agent() -> None:
+        async with RecordingClient(sample_server, recorder=recorder) as client:
+            await client.list_tools()
+            for _ in range(requests):
+                name, make_arguments = random.choice(mix)
+                try:
+                    # fetch_weatherは外部APIを呼ぶので、応答が無い場合に備えてタイムアウトを付ける
+                    await client.call_tool_mcp(name, make_arguments(), timeout=2)
+                except McpError:
+                    # タイムアウトもエラーとして記録済み
+                    pass
+                await asyncio.sleep(random.expovariate(200))
+
+    await asyncio.gather(*(agent() for _ in range(sessions)))
+    recorder.save(path)
+    print(f"recorded {len(recorder.events)} requests from {sessions} sessions to {path}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Record and replay MCP traffic.")
+    # action="append"にdefaultを渡すと既定値に追記されてしまうので、未指定の場合は解析後にDEFAULT_STUB_TOOLSを使う
+    stubbed = ", ".join(sorted(DEFAULT_STUB_TOOLS))
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="record sample traffic against the in-memory server")
+    record_parser.add_argument("recording")
+    record_parser.add_argument("--sessions", type=int, default=4)
+    record_parser.add_argument("--requests", type=int, default=50)
+    record_parser.add_argument("--keep-response", action="append",
+                               help=f"tools whose responses are stored, so replay can stub them (default: {stubbed})")
+    replay_parser = commands.add_parser("replay", help="replay a recording and report latencies")
+    replay_parser.add_argument("recording")
+    replay_parser.add_argument("--transport", choices=["in-memory", "stdio"], default="in-memory")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="N× speed, 0 for as fast as possible")
+    replay_parser.add_argument("--stub", action="append", help=f"tools answered from the recording (default: {stubbed})")
+    replay_parser.add_argument("--save", help="write the latency summary as JSON for compare")
+    compare_parser = commands.add_parser("compare", help="compare two saved replay summaries")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    args = parser.parse_args()
+    # ToolErrorのトレースバックがログに出てレイテンシに影響しないようにする
+    logging.getLogger("FastMCP").setLevel(logging.CRITICAL)
+
+    if args.command == "record":
+        await record_sample_traffic(args.recording, args.sessions, args.requests, set(args.keep_response or DEFAULT_STUB_TOOLS))
+    elif args.command == "replay":
+        header, events = load_recording(args.recording)
+        samples = await replay(events, make_client_factory(args.transport), args.speed or None, set(args.stub or DEFAULT_STUB_TOOLS))
+        summary = summarize(samples)
+        print(f"[{args.transport} x{args.speed or 'max'}] {len(samples)} requests, {header['sessions']} sessions")
+        print_summary(summary)
+        print("compared with the recording:")
+        compare(summarize_recording(events), summary)
+        if args.save:
+            with open(args.save, "w") as f:
+                json.dump(summary, f, indent=2)
+    else:
+        with open(args.baseline) as f, open(args.candidate) as g:
+            compare(json.load(f), json.load(g))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,353 @@
+import base64
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Callable, Iterable
+from typing import Any
+
+import mcp.types
+from fastmcp import FastMCP
+from fastmcp.prompts.prompt_manager import PromptManager
+from fastmcp.resources.resource_manager import ResourceManager
+from fastmcp.server.proxy import FastMCPProxy
+from fastmcp.tools.tool_manager import ToolManager
+from fastmcp.utilities.cache import TimedCache
+
+# [Indexed Registry]
+# FastMCP 2.5のToolManager等はdictで管理しているだけなので、tagやnameの前方一致での検索は全件の線形走査になる
+# またlist_toolsは毎回全ツールのスキーマを組み立て直して、ページングなしで全件を返却する
+# ツールが数千件になる場合に備えて
+# ・tagとnameの前方一致用のインデックス
+# ・カーソルベースのページング
+# ・MCP形式（mcp.types.Tool等）に変換したオブジェクトのキャッシュ
+# を持たせたManagerとFastMCPを用意する
+# ※JSONへのシリアライズはMCPのセッション層が応答ごとに行うので、キャッシュされるのは変換処理(to_mcp_tool等)の分だけ
+
+DEFAULT_PAGE_SIZE = 100
+
+
+def encode_cursor(key: str) -> str:
+    # カーソルは最後に返したキー。クライアントからは不透明な文字列として扱ってもらう
+    return base64.urlsafe_b64encode(key.encode()).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> str:
+    # urlsafe_b64decodeは不正な文字を読み飛ばすので、validate=Trueで厳密にデコードする
+    try:
+        key = base64.b64decode(cursor.encode("ascii"), altchars=b"-_", validate=True).decode()
+    except (ValueError, UnicodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if not key:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return key
+
+
+class InvalidatingCache(TimedCache):
+    """TimedCache that also runs callbacks whenever it is cleared."""
+
+    def __init__(self, expiration, on_clear: Iterable[Callable[[], None]] = ()):
+        super().__init__(expiration)
+        self.on_clear = list(on_clear)
+
+    def clear(self) -> None:
+        super().clear()
+        for callback in self.on_clear:
+            callback()
+
+
+class RegistryIndex:
+    """Sorted key list, tag index and MCP schema cache for one kind of component."""
+
+    def __init__(self, to_mcp: Callable[[str], Any]):
+        self._to_mcp = to_mcp
+        self._keys: list[str] = []
+        self._tags: dict[str, set[str]] = {}
+        self._key_tags: dict[str, set[str]] = {}
+        self._schemas: dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str, tags: Iterable[str]) -> None:
+        """Add or replace key. Call after the manager has stored the component."""
+        if key in self._key_tags:
+            self.remove(key)
+        insort(self._keys, key)
+        self._key_tags[key] = set(tags)
+        for tag in self._key_tags[key]:
+            self._tags.setdefault(tag, set()).add(key)
+
+    def extend(self, items: Iterable[tuple[str, Iterable[str]]]) -> None:
+        """Add many (key, tags) pairs, sorting the keys once instead of one insort per key."""
+        for key, tags in items:
+            if key in self._key_tags:
+                self.remove(key)
+            self._key_tags[key] = set(tags)
+            for tag in self._key_tags[key]:
+                self._tags.setdefault(tag, set()).add(key)
+        self._keys = sorted(self._key_tags)
+
+    def remove(self, key: str) -> None:
+        index = bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+        for tag in self._key_tags.pop(key, set()):
+            self._tags[tag].discard(key)
+            if not self._tags[tag]:
+                del self._tags[tag]
+        self._schemas.pop(key, None)
+
+    def schema(self, key: str) -> Any:
+        """MCP object (e.g. mcp.types.Tool) for key, converted once and reused until the component changes.
+
+        The object is still serialized by the MCP session on every response.
+        """
+        if (cached := self._schemas.get(key)) is None:
+            cached = self._schemas[key] = self._to_mcp(key)
+        return cached
+
+    def find(self, tags: Iterable[str] | None = None, prefix: str | None = None) -> list[str]:
+        """Keys that have all of tags and start with prefix, in sorted order."""
+        if prefix:
+            # ソート済みなので前方一致は二分探索で範囲を切り出せる
+            start = bisect_left(self._keys, prefix)
+            end = bisect_left(self._keys, prefix + "\U0010ffff", lo=start)
+            keys = self._keys[start:end]
+        else:
+            keys = self._keys
+        if tags:
+            tag_sets = sorted((self._tags.get(tag, set()) for tag in tags), key=len)
+            matched = set.intersection(*tag_sets)
+            keys = [key for key in keys if key in matched] if prefix else sorted(matched)
+        return list(keys)
+
+    def page(self, cursor: str | None, limit: int = DEFAULT_PAGE_SIZE) -> tuple[list[Any], str | None]:
+        """One page of MCP schemas after cursor and the cursor for the next page."""
+        start = bisect_right(self._keys, decode_cursor(cursor)) if cursor else 0
+        keys = self._keys[start:start + limit]
+        next_cursor = encode_cursor(keys[-1]) if start + limit < len(self._keys) else None
+        return [self.schema(key) for key in keys], next_cursor
+
+
+class IndexedToolManager(ToolManager):
+    """ToolManager that keeps a RegistryIndex in sync with its tools."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.index = RegistryIndex(lambda key: self._tools[key].to_mcp_tool(name=key))
+
+    def add_tool(self, tool, key=None):
+        tool = super().add_tool(tool, key=key)
+        key = key or tool.name
+        # duplicate_behavior="ignore"の場合は既存のツールが残るので、格納されている方でインデックスを更新する
+        self.index.add(key, self._tools[key].tags)
+        return tool
+
+    def remove_tool(self, key: str) -> None:
+        super().remove_tool(key)
+        self.index.remove(key)
+
+
+class IndexedPromptManager(PromptManager):
+    """PromptManager that keeps a RegistryIndex in sync with its prompts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.index = RegistryIndex(lambda key: self._prompts[key].to_mcp_prompt(name=key))
+
+    def add_prompt(self, prompt, key=None):
+        prompt = super().add_prompt(prompt, key=key)
+        key = key or prompt.name
+        self.index.add(key, self._prompts[key].tags)
+        return prompt
+
+
+class IndexedResourceManager(ResourceManager):
+    """ResourceManager that indexes concrete resources and templates separately."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.index = RegistryIndex(lambda key: self._resources[key].to_mcp_resource(uri=key))
+        self.template_index = RegistryIndex(
+            lambda key: self._templates[key].to_mcp_template(uriTemplate=key)
+        )
+
+    def add_resource(self, resource, key=None):
+        resource = super().add_resource(resource, key=key)
+        key = key or str(resource.uri)
+        self.index.add(key, self._resources[key].tags)
+        return resource
+
+    def add_template(self, template, key=None):
+        template = super().add_template(template, key=key)
+        key = key or template.uri_template
+        self.template_index.add(key, self._templates[key].tags)
+        return template
+
+
+class IndexedFastMCP(FastMCP):
+    """FastMCP whose tools/prompts/resources lists are indexed and paginated.
+
+    list_tools / list_prompts / list_resources return at most page_size items and a
+    nextCursor. Filtered lookups go through find_tools / find_prompts / find_resources.
+    """
+
+    def __init__(self, *args, page_size: int = DEFAULT_PAGE_SIZE, **kwargs):
+        if page_size < 1:
+            raise ValueError(f"page_size must be at least 1, got {page_size}")
+        super().__init__(*args, **kwargs)
+        self.page_size = page_size
+        # mountしたサーバーがある場合に、マージ済みの一覧から作ったインデックスを種類ごとに保持する
+        # FastMCPはツールの追加・削除やmount/unmountのたびに_cacheをクリアするので、同じタイミングで破棄する
+        self._merged_indexes: dict[str, RegistryIndex] = {}
+        self._cache = InvalidatingCache(self._cache.expiration, [self._merged_indexes.clear])
+        self._tool_manager = IndexedToolManager(
+            duplicate_behavior=self._tool_manager.duplicate_behavior,
+            serializer=self._tool_manager._serializer,
+            mask_error_details=self._tool_manager.mask_error_details,
+        )
+        self._resource_manager = IndexedResourceManager(
+            duplicate_behavior=self._resource_manager.duplicate_behavior,
+            mask_error_details=self._resource_manager.mask_error_details,
+        )
+        self._prompt_manager = IndexedPromptManager(
+            duplicate_behavior=self._prompt_manager.duplicate_behavior,
+            mask_error_details=self._prompt_manager.mask_error_details,
+        )
+
+    def _setup_handlers(self) -> None:
+        super()._setup_handlers()
+        # 低レベルサーバーのlist_tools()デコレーターはカーソルを渡してくれないので、リクエストハンドラーを直接差し替える
+        handlers = self._mcp_server.request_handlers
+        handlers[mcp.types.ListToolsRequest] = self._list_tools_page
+        handlers[mcp.types.ListPromptsRequest] = self._list_prompts_page
+        handlers[mcp.types.ListResourcesRequest] = self._list_resources_page
+        handlers[mcp.types.ListResourceTemplatesRequest] = self._list_resource_templates_page
+
+    def mount(self, prefix: str, server: FastMCP, *args, **kwargs) -> None:
+        super().mount(prefix, server, *args, **kwargs)
+        self._watch_mounted_servers()
+
+    def unmount(self, prefix: str) -> None:
+        server = self._mounted_servers[prefix].server
+        super().unmount(prefix)
+        # 外したサーバー（とその子孫）が、以降も親のキャッシュを破棄し続けないようにコールバックを外す
+        self._unwatch(server)
+        self._watch_mounted_servers()
+
+    def _unwatch(self, server: FastMCP) -> None:
+        pending = [server]
+        while pending:
+            server = pending.pop()
+            callbacks = server._cache.on_clear if isinstance(server._cache, InvalidatingCache) else []
+            if self._on_mounted_server_change in callbacks:
+                callbacks.remove(self._on_mounted_server_change)
+            pending += [mounted.server for mounted in server._mounted_servers.values()]
+
+    def _on_mounted_server_change(self) -> None:
+        self._cache.clear()
+        # 子サーバーに後からmountされたサーバーも監視対象にする
+        self._watch_mounted_servers()
+
+    def _watch_mounted_servers(self) -> None:
+        # 子サーバー側でツールが追加・削除された場合は子の_cacheしかクリアされないので、
+        # 子孫サーバーの_cacheにも親のキャッシュを破棄するコールバックを登録しておく
+        pending = [mounted.server for mounted in self._mounted_servers.values()]
+        while pending:
+            server = pending.pop()
+            if not isinstance(server._cache, InvalidatingCache):
+                server._cache = InvalidatingCache(server._cache.expiration)
+            if self._on_mounted_server_change not in server._cache.on_clear:
+                server._cache.on_clear.append(self._on_mounted_server_change)
+            pending += [mounted.server for mounted in server._mounted_servers.values()]
+
+    def _has_proxy(self) -> bool:
+        pending = [mounted.server for mounted in self._mounted_servers.values()]
+        while pending:
+            server = pending.pop()
+            if isinstance(server, FastMCPProxy):
+                return True
+            pending += [mounted.server for mounted in server._mounted_servers.values()]
+        return False
+
+    async def _index_for(self, kind: str, local_index: RegistryIndex, get_all, to_mcp) -> RegistryIndex:
+        if not self._mounted_servers:
+            return local_index
+        # mountしたサーバーがある場合は、マージ済みの一覧からインデックスを一度だけ作って使い回す
+        # プロキシ越しのサーバーは変更を検知出来ないので、その場合は毎回作り直す
+        if (index := self._merged_indexes.get(kind)) is not None:
+            return index
+        components = await get_all()
+        index = RegistryIndex(lambda key: to_mcp(key, components[key]))
+        index.extend((key, component.tags) for key, component in components.items())
+        if not self._has_proxy():
+            self._merged_indexes[kind] = index
+        return index
+
+    async def _tool_index(self) -> RegistryIndex:
+        return await self._index_for(
+            "tools",
+            self._tool_manager.index,
+            self.get_tools,
+            lambda key, tool: tool.to_mcp_tool(name=key),
+        )
+
+    async def _prompt_index(self) -> RegistryIndex:
+        return await self._index_for(
+            "prompts",
+            self._prompt_manager.index,
+            self.get_prompts,
+            lambda key, prompt: prompt.to_mcp_prompt(name=key),
+        )
+
+    async def _resource_index(self) -> RegistryIndex:
+        return await self._index_for(
+            "resources",
+            self._resource_manager.index,
+            self.get_resources,
+            lambda key, resource: resource.to_mcp_resource(uri=key),
+        )
+
+    async def _resource_template_index(self) -> RegistryIndex:
+        return await self._index_for(
+            "resource_templates",
+            self._resource_manager.template_index,
+            self.get_resource_templates,
+            lambda key, template: template.to_mcp_template(uriTemplate=key),
+        )
+
+    @staticmethod
+    def _cursor(request) -> str | None:
+        return request.params.cursor if request.params else None
+
+    async def _list_tools_page(self, request: mcp.types.ListToolsRequest) -> mcp.types.ServerResult:
+        tools, next_cursor = (await self._tool_index()).page(self._cursor(request), self.page_size)
+        return mcp.types.ServerResult(mcp.types.ListToolsResult(tools=tools, nextCursor=next_cursor))
+
+    async def _list_prompts_page(self, request: mcp.types.ListPromptsRequest) -> mcp.types.ServerResult:
+        prompts, next_cursor = (await self._prompt_index()).page(self._cursor(request), self.page_size)
+        return mcp.types.ServerResult(mcp.types.ListPromptsResult(prompts=prompts, nextCursor=next_cursor))
+
+    async def _list_resources_page(self, request: mcp.types.ListResourcesRequest) -> mcp.types.ServerResult:
+        resources, next_cursor = (await self._resource_index()).page(self._cursor(request), self.page_size)
+        return mcp.types.ServerResult(mcp.types.ListResourcesResult(resources=resources, nextCursor=next_cursor))
+
+    async def _list_resource_templates_page(
+        self, request: mcp.types.ListResourceTemplatesRequest
+    ) -> mcp.types.ServerResult:
+        templates, next_cursor = (await self._resource_template_index()).page(
+            self._cursor(request), self.page_size
+        )
+        return mcp.types.ServerResult(
+            mcp.types.ListResourceTemplatesResult(resourceTemplates=templates, nextCursor=next_cursor)
+        )
+
+    async def find_tools(self, tags: Iterable[str] | None = None, prefix: str | None = None) -> list[str]:
+        """Tool keys that have all of tags and start with prefix."""
+        return (await self._tool_index()).find(tags, prefix)
+
+    async def find_prompts(self, tags: Iterable[str] | None = None, prefix: str | None = None) -> list[str]:
+        """Prompt keys that have all of tags and start with prefix."""
+        return (await self._prompt_index()).find(tags, prefix)
+
+    async def find_resources(self, tags: Iterable[str] | None = None, prefix: str | None = None) -> list[str]:
+        """Resource URIs that have all of tags and start with prefix."""
+        return (await self._resource_index()).find(tags, prefix)
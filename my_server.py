@@ -3,6 +3,8 @@ import time
 import yaml
 from fastmcp import FastMCP
 
+from prompt_rendering import enable_prompt_cache, summarize_numbers
+
 # Define a custom serializer that formats dictionaries as YAML
 def yaml_serializer(data):
     # もしシリアライザー関数内で例外が起きた場合、デフォルトのjson形式で返却される
@@ -20,6 +22,8 @@ mcp = FastMCP(
     # String型以外の返り値に適用される。String型は適用されずにそのまま返却される。
     tool_serializer=yaml_serializer
 )
+# 同じ引数でのget_promptはレンダリング済みの結果を返す
+enable_prompt_cache(mcp)
 
 @mcp.tool()
 def greet(name: str, duration_time_second: float) -> str:
@@ -36,7 +40,7 @@ def divide(a:int, b:int) -> float:
 @mcp.prompt()
 def analyze_data(data_points: list[float]) -> str:
     """Creates a prompt asking for analysis of numerical data."""
-    formatted_data = ", ".join(str(point) for point in data_points)
+    formatted_data = summarize_numbers(data_points)
     return f"Please analyze these data points: {formatted_data}"
 
 # Prompts
@@ -44,7 +48,8 @@ def analyze_data(data_points: list[float]) -> str:
 @mcp.prompt()
 def analyze_data(data_points: list[float]) -> str:
     """Creates a prompt asking for analysis of numerical data."""
-    formatted_data = ", ".join(str(point) for point in data_points)
+    # 巨大なリストがそのまま数MBのプロンプトにならないように、先頭・末尾と統計値に要約する
+    formatted_data = summarize_numbers(data_points)
     return f"Please analyze these data points: {formatted_data}"
 
 
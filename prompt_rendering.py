@@ -0,0 +1,150 @@
+import hashlib
+import inspect
+import json
+import pickle
+from collections import OrderedDict, deque
+from collections.abc import Iterable
+from typing import Any
+
+from fastmcp import Context, FastMCP
+from fastmcp.prompts.prompt_manager import PromptManager
+from fastmcp.utilities.types import find_kwarg_by_type
+from mcp.types import EmbeddedResource, GetPromptResult
+
+# [Prompt Rendering]
+# get_promptのたびに、プロンプト関数の呼び出し・引数のバリデーション・PromptMessageへの変換が行われる
+# 同じ引数で何度も呼ばれるプロンプトは、レンダリング済みの結果をLRUでキャッシュしておく
+# また大きな数値リストをそのまま文字列にすると数MBのプロンプトになるので、要約して上限を設ける
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_MAX_ITEMS = 100
+
+
+def summarize_numbers(points: Iterable[float], max_items: int = DEFAULT_MAX_ITEMS) -> str:
+    """Format numbers as "a, b, c", truncating long inputs to head/tail items plus summary statistics.
+
+    points is consumed in a single pass, so generators work and only max_items values are kept in memory.
+    max_items must be at least 2 so that both a head and a tail value can be shown.
+    """
+    if max_items < 2:
+        raise ValueError(f"max_items must be at least 2, got {max_items}")
+    head_size = max_items // 2
+    head: list[str] = []
+    tail: deque[float] = deque(maxlen=max_items - head_size)
+    count = 0
+    total = 0.0
+    minimum = maximum = None
+
+    for point in points:
+        count += 1
+        total += point
+        minimum = point if minimum is None or point < minimum else minimum
+        maximum = point if maximum is None or point > maximum else maximum
+        if len(head) < head_size:
+            head.append(str(point))
+        else:
+            tail.append(point)
+
+    if count <= max_items:
+        return ", ".join(head + [str(point) for point in tail])
+
+    # 先頭と末尾だけ残し、省略した件数と全体の統計値を添える
+    omitted = count - len(head) - len(tail)
+    return (
+        f"{', '.join(head)}, ... ({omitted} values omitted) ..., {', '.join(str(point) for point in tail)}"
+        f" [count={count}, min={minimum}, max={maximum}, mean={total / count}]"
+    )
+
+
+def copy_result(result: GetPromptResult) -> GetPromptResult:
+    """Copy of result whose messages, contents and embedded resources can be modified independently.
+
+    model_copy(deep=True) is slower than rendering the prompt again, so only the mutable layers are
+    copied; the remaining fields are immutable strings.
+    """
+    messages = []
+    for message in result.messages:
+        content = message.content.model_copy()
+        if isinstance(content, EmbeddedResource):
+            content.resource = content.resource.model_copy()
+        messages.append(message.model_copy(update={"content": content}))
+    return result.model_copy(update={"messages": messages})
+
+
+class CachedPromptManager(PromptManager):
+    """PromptManager that memoises rendered prompts by name and arguments with LRU eviction.
+
+    Prompts that take a Context or are async (and may fetch external data) are always rendered.
+    """
+
+    def __init__(self, *args, maxsize: int = DEFAULT_CACHE_SIZE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._rendered: OrderedDict[tuple[str, bytes], GetPromptResult] = OrderedDict()
+        self._cacheable: dict[str, bool] = {}
+
+    def add_prompt(self, prompt, key=None):
+        prompt = super().add_prompt(prompt, key=key)
+        key = key or prompt.name
+        # find_kwarg_by_typeは型ヒントの解決を伴って遅いので、登録時に一度だけ判定しておく
+        stored = self._prompts[key]
+        self._cacheable[key] = (
+            not inspect.iscoroutinefunction(stored.fn)
+            and find_kwarg_by_type(stored.fn, kwarg_type=Context) is None
+        )
+        # 同名のプロンプトが差し替えられた可能性があるのでキャッシュを破棄する
+        self._rendered.clear()
+        return prompt
+
+    def is_cacheable(self, name: str) -> bool:
+        return self._cacheable.get(name, False)
+
+    @staticmethod
+    def cache_key(name: str, arguments: dict[str, Any] | None) -> tuple[str, bytes]:
+        # 引数にはlistなどhash出来ない値も来るので、シリアライズしてからダイジェストを取る
+        # 大きな数値リストではjson.dumpsよりpickleの方が桁違いに速い。pickle出来ない値の場合だけJSONにする
+        items = sorted((arguments or {}).items())
+        try:
+            encoded = pickle.dumps(items, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            encoded = json.dumps(items, default=str).encode()
+        return name, hashlib.blake2b(encoded, digest_size=16).digest()
+
+    async def render_prompt(self, name: str, arguments: dict[str, Any] | None = None) -> GetPromptResult:
+        # maxsize=0でキャッシュを無効化出来る
+        if self.maxsize <= 0 or not self.is_cacheable(name):
+            return await super().render_prompt(name, arguments)
+
+        key = self.cache_key(name, arguments)
+        if (cached := self._rendered.get(key)) is not None:
+            self._rendered.move_to_end(key)
+            self.hits += 1
+            # 呼び出し側がmessagesを書き換えてもキャッシュが壊れないように、コピーを返す
+            return copy_result(cached)
+
+        self.misses += 1
+        result = await super().render_prompt(name, arguments)
+        self._rendered[key] = copy_result(result)
+        if len(self._rendered) > self.maxsize:
+            self._rendered.popitem(last=False)
+        return result
+
+    def clear_cache(self) -> None:
+        self._rendered.clear()
+        self.hits = self.misses = 0
+
+
+def enable_prompt_cache(server: FastMCP, maxsize: int = DEFAULT_CACHE_SIZE) -> CachedPromptManager:
+    """Replace server's PromptManager with a CachedPromptManager, keeping registered prompts."""
+    current = server._prompt_manager
+    manager = CachedPromptManager(
+        duplicate_behavior=current.duplicate_behavior,
+        mask_error_details=current.mask_error_details,
+        maxsize=maxsize,
+    )
+    for key, prompt in current.get_prompts().items():
+        manager.add_prompt(prompt, key=key)
+    server._prompt_manager = manager
+    return manager
@@ -0,0 +1,147 @@
+import base64
+import json
+import zlib
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from fastmcp import Context
+from mcp.types import BlobResourceContents, EmbeddedResource, TextContent
+
+# msgpackは任意の依存関係（pip install msgpack）。入っていない場合はjson+zlibのみ使える
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# [Result Encoding]
+# list[dict]のような大きな返り値は、デフォルトだとJSON（my_serverではYAML）のテキストになり、サイズが膨らむ
+# クライアントとサーバーで事前にエンコーディングを取り決めておき、閾値を超えた結果だけをバイナリのblobで返却する
+# blobはJSON-RPC上ではbase64文字列になるが、圧縮やMessagePackで元のテキストよりは十分に小さくなる
+
+DEFAULT_THRESHOLD = 64 * 1024
+# 長いlistは先頭のSAMPLE_ITEMS件だけシリアライズして全体のサイズを見積もる
+SAMPLE_ITEMS = 16
+
+MIME_TYPES = {
+    "msgpack+zlib": "application/msgpack+zlib",
+    "msgpack": "application/msgpack",
+    "json+zlib": "application/json+zlib",
+}
+# bytes/memoryviewの返り値はシリアライズせずにそのまま（必要なら圧縮だけして）渡す
+RAW_MIME_TYPES = {
+    "application/octet-stream": False,
+    "application/octet-stream+zlib": True,
+}
+RESULT_URI = "result://encoded"
+
+# セッションごとに取り決めたエンコーディングと閾値を保持する（セッションが破棄されたら自動で消える）
+_session_encodings: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def available_encodings() -> list[str]:
+    """Encodings this process can produce, in order of preference."""
+    return [name for name in MIME_TYPES if msgpack is not None or not name.startswith("msgpack")]
+
+
+def negotiate(ctx: Context, accept: list[str], threshold: int = DEFAULT_THRESHOLD) -> str | None:
+    """Pick the first encoding in accept that the server supports and remember it for this session."""
+    supported = available_encodings()
+    encoding = next((name for name in accept if name in supported), None)
+    if encoding is None:
+        _session_encodings.pop(ctx.session, None)
+    else:
+        _session_encodings[ctx.session] = (encoding, threshold)
+    return encoding
+
+
+def serialize(data: Any, encoding: str) -> bytes:
+    """Serialize data with the given encoding, before compression."""
+    if encoding.startswith("msgpack"):
+        return msgpack.packb(data)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def compress(packed: bytes, encoding: str) -> bytes:
+    return zlib.compress(packed, 1) if encoding.endswith("+zlib") else packed
+
+
+def estimate_size(data: Any, encoding: str) -> int | None:
+    """Approximate serialized size of a long list/tuple from its first SAMPLE_ITEMS items, else None."""
+    if isinstance(data, list | tuple) and len(data) > SAMPLE_ITEMS:
+        return len(serialize(data[:SAMPLE_ITEMS], encoding)) * len(data) // SAMPLE_ITEMS
+    return None
+
+
+def encode(data: Any, encoding: str) -> bytes:
+    """Serialize data with the given encoding."""
+    return compress(serialize(data, encoding), encoding)
+
+
+def decode(blob: bytes, encoding: str) -> Any:
+    """Inverse of encode."""
+    if encoding.endswith("+zlib"):
+        blob = zlib.decompress(blob)
+    if encoding.startswith("msgpack"):
+        return msgpack.unpackb(blob)
+    return json.loads(blob)
+
+
+def to_blob_content(payload: bytes | memoryview, mime_type: str) -> EmbeddedResource:
+    # base64.b64encodeはbuffer protocolを受け付けるので、memoryviewをbytesにコピーせずに渡せる
+    blob = base64.b64encode(payload).decode("ascii")
+    return EmbeddedResource(
+        type="resource",
+        resource=BlobResourceContents(uri=RESULT_URI, mimeType=mime_type, blob=blob),
+    )
+
+
+def encode_result(data: Any, ctx: Context) -> Any:
+    """Encode a tool result as a blob if this session negotiated an encoding and the result is large enough.
+
+    bytes/bytearray/memoryview are always returned as an application/octet-stream blob
+    (zlib-compressed when negotiated and over the threshold). For other data the size before
+    compression is compared with the threshold, estimated from a sample for long lists and
+    otherwise serialized once and reused. Below it, or without a negotiated encoding, data is
+    returned unchanged and FastMCP serializes it as usual.
+    """
+    negotiated = _session_encodings.get(ctx.session)
+
+    if isinstance(data, bytes | bytearray | memoryview):
+        # 生のバイト列はシリアライズ不要。FastMCPに渡すとstr()やJSON文字列にされてしまうので、常にblobで返す
+        # 閾値判定もコピーせずにnbytesで行う
+        if negotiated and negotiated[0].endswith("+zlib") and memoryview(data).nbytes >= negotiated[1]:
+            return to_blob_content(zlib.compress(data, 1), "application/octet-stream+zlib")
+        return to_blob_content(data, "application/octet-stream")
+
+    if negotiated is None:
+        return data
+    encoding, threshold = negotiated
+    # 閾値は圧縮前のサイズで判定する。見積もりが閾値の半分にも届かない結果は、シリアライズせずにそのまま返す
+    # 閾値に近い場合だけ実際にシリアライズし、その結果を圧縮にも使い回す
+    estimated = estimate_size(data, encoding)
+    if estimated is not None and estimated < threshold // 2:
+        return data
+    packed = serialize(data, encoding)
+    if len(packed) < threshold:
+        return data
+    return to_blob_content(compress(packed, encoding), MIME_TYPES[encoding])
+
+
+def decode_result(contents: list) -> Any:
+    """Client side: turn call_tool contents back into Python data.
+
+    Blob results produced by encode_result are decoded; plain text results are returned as text.
+    """
+    content = contents[0]
+    if isinstance(content, EmbeddedResource) and isinstance(content.resource, BlobResourceContents):
+        mime_type = content.resource.mimeType
+        blob = base64.b64decode(content.resource.blob)
+        if mime_type in RAW_MIME_TYPES:
+            return zlib.decompress(blob) if RAW_MIME_TYPES[mime_type] else blob
+        encoding = next((name for name, mime in MIME_TYPES.items() if mime == mime_type), None)
+        if encoding is None:
+            raise ValueError(f"Unsupported result mimeType: {mime_type!r}")
+        return decode(blob, encoding)
+    if isinstance(content, TextContent):
+        return content.text
+    return content
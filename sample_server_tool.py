@@ -1,4 +1,5 @@
 import asyncio
+import json
 import uuid
 from enum import Enum
 from pathlib import Path
@@ -6,9 +7,13 @@ from typing import Literal, Annotated
 
 import aiohttp
 from fastmcp import FastMCP, Context
-from fastmcp.exceptions import ToolError
+from fastmcp.exceptions import NotFoundError, ToolError
+from mcp.types import EmbeddedResource, TextContent
 from pydantic import Field, BaseModel
 
+import result_encoding
+from result_encoding import encode_result
+
 # 名前を付けることでクライアント側やログからサーバーを特定するのに役立つ
 # 引数instructionsではサーバーとのやり取り方法についての指示を指定出来る
 mcp = FastMCP(
@@ -43,11 +48,12 @@ def search_database(
     description="Search the product catalog with optional category filtering.", # Custom description
     tags={"catalog", "search"}      # Optional tags for organization/filtering
 )
-def search_products_implementation(query: str, category: str | None = None) -> list[dict]:
+def search_products_implementation(query: str, ctx: Context, category: str | None = None) -> list[dict] | EmbeddedResource:
     """Internal function description (ignored if description is provided above)."""
     # Implementation...
     print(f"Searching for '{query}' in category '{category}'")
-    return [{"id": 2, "name": "Another Product"}]
+    # negotiate_result_encodingで取り決めたエンコーディングがあれば、大きな結果はblobで返却される
+    return encode_result([{"id": 2, "name": "Another Product"}], ctx)
 
 
 # Synchronous tool (suitable for CPU-bound or quick tasks)
@@ -259,5 +265,62 @@ def my_tool(): return "Version 1"
 # Legacy JSON Parsing
 # 2.2.10以降での挙動変更の話題であり、こちらのPJで使用しているのは2.5.X系のため関係なし
 
+
+# [Result Encoding]
+# クライアントが受け取れるエンコーディングを優先順に渡し、サーバーが対応しているものを1つ選ぶ
+# 以降このセッションでは、encode_resultを通した結果のうち閾値を超えたものがblobで返却される
+@mcp.tool()
+def negotiate_result_encoding(
+    accept: list[str],
+    ctx: Context,
+    threshold: int = Field(result_encoding.DEFAULT_THRESHOLD, ge=0, description="Minimum serialized size in bytes, before compression"),
+) -> str:
+    """Negotiate a compact binary encoding for large tool results in this session."""
+    return result_encoding.negotiate(ctx, accept, threshold) or "none"
+
+
+# [Batch Calls]
+# multiplyやdivideのような軽い処理は、処理そのものよりもJSON-RPCの往復とバリデーションのコストが大きい
+# 複数の呼び出しを1リクエストにまとめて、結果を入力と同じ順番で返却する
+# 1リクエストで際限なく処理が積まれないように、まとめられる件数には上限を設ける
+MAX_BATCH_CALLS = 1000
+
+
+class ToolCall(BaseModel):
+    tool: str = Field(description="Name of the tool to call")
+    arguments: dict = Field(default_factory=dict, description="Arguments to pass to the tool")
+
+
+def content_value(content) -> object:
+    # 各ツールの結果はデフォルトのシリアライザーでJSON文字列になっているので、JSONならデコードして二重エンコードを避ける
+    if isinstance(content, TextContent):
+        try:
+            return json.loads(content.text)
+        except ValueError:
+            return content.text
+    return content.model_dump(mode="json")
+
+
+@mcp.tool()
+async def batch_call(
+    calls: Annotated[list[ToolCall], Field(max_length=MAX_BATCH_CALLS, description="Tool calls to run in order")],
+) -> list[dict]:
+    """Run several tool calls in one request and return their results in order."""
+    results = []
+    for call in calls:
+        # batch_callの入れ子は許可しない
+        if call.tool == "batch_call":
+            results.append({"tool": call.tool, "error": "Nested batch_call is not allowed."})
+            continue
+        try:
+            # ToolManagerを直接呼ぶとmountしたサーバーのツールが見つからないので、サーバー自身の呼び出し経路を通す
+            contents = await mcp._mcp_call_tool(call.tool, call.arguments)
+        except (ToolError, NotFoundError) as e:
+            # 1件の失敗でバッチ全体を失敗させず、その要素にだけエラーを入れる
+            results.append({"tool": call.tool, "error": str(e)})
+            continue
+        results.append({"tool": call.tool, "result": [content_value(content) for content in contents]})
+    return results
+
 if __name__ == "__main__":
     mcp.run()
@@ -5,7 +5,11 @@ from fastmcp import FastMCP
 from fastmcp.prompts.prompt import Message, PromptMessage, TextContent
 from pydantic import Field
 
+from prompt_rendering import enable_prompt_cache
+
 mcp = FastMCP(name="PromptServer")
+# レンダリング結果を引数ごとにLRUでキャッシュする（非同期やContextを使うプロンプトは対象外）
+enable_prompt_cache(mcp)
 
 # [Prompts]
 # The @prompt Decorator